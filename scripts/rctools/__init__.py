@@ -0,0 +1,37 @@
+# SPDX-License-Identifier: MIT
+#
+# RC transponder tools
+#
+# Functions and submodules are imported on first access, eg:
+# rctools.genid or rctools.lfscope, so that importing the package
+# or running a command loads only what that command uses.
+#
+
+import importlib
+
+_LAZY = ('batch', 'crc', 'idblock', 'ihex', 'info', 'lfparams', 'lfscope',
+         'patch', 'prog')
+
+_EXPORTS = {
+    'mcrf4xx': 'crc',
+    'idcrc4': 'crc',
+    'idtoken': 'idblock',
+    'genid': 'idblock',
+    'find_idblock': 'idblock',
+    'read_idno': 'idblock',
+    'patch_idblock': 'idblock',
+    'read_idlocs': 'idblock',
+    'ihexline': 'ihex',
+    'prog_to_ihex': 'ihex',
+    'pic16f639_hex': 'ihex',
+}
+
+
+def __getattr__(name):
+    """Import submodules and their functions on first use"""
+    if name in _LAZY:
+        return importlib.import_module('.' + name, __name__)
+    if name in _EXPORTS:
+        module = importlib.import_module('.' + _EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: MIT
+#
+# usage: rctool command [options]
+#
+# Single entry point for the RC transponder tools. Only argparse
+# is loaded at startup, command modules are imported on dispatch.
+#
+
+import sys
+import argparse
+from .lfparams import RAWFORMATS, INACTIVITY
+
+# Use numpy batch path for genid ranges at least this long
+BATCHMIN = 1024
+
+
+def _idno(val):
+    """Parse ID number argument, any integer base"""
+    try:
+        idno = int(val, base=0)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid ID number: %r' % (val))
+    if idno < 0 or idno > 0xfffff:
+        raise argparse.ArgumentTypeError('ID number out of range: %r' % (val))
+    return idno
+
+
+def _logging():
+    """Configure logging for commands that report through it"""
+    import logging
+    logging.basicConfig()
+
+
+def cmd_info(args):
+    _logging()
+    from .info import info
+    return info()
+
+
+def cmd_patch(args):
+    _logging()
+    from .patch import patch
+    return patch(args.firmware, args.idno)
+
+
+def cmd_genid(args):
+    last = args.first if args.last is None else args.last
+    if last < args.first:
+        args.parser.error('last ID is less than first ID')
+    idnos = range(args.first, last + 1)
+    out = sys.stdout
+    if len(idnos) >= BATCHMIN:
+        try:
+            from .batch import genid_ids
+            blocks = genid_ids(idnos)
+            for idno, block in zip(idnos, blocks):
+                out.write('%d - %s\n' % (idno, block.tobytes().hex()))
+            return 0
+        except ImportError:
+            pass
+    from .idblock import genid
+    for idno in idnos:
+        out.write('%d - %s\n' % (idno, bytes(genid(idno)).hex()))
+    return 0
+
+
+def cmd_lfscope(args):
+    if args.rate is None:
+        for capture in args.capture:
+            if not capture.lower().endswith('.wav'):
+                args.parser.error('sample rate required for raw capture %r'
+                                  % (capture))
+    _logging()
+    from .lfscope import lfscope
+    return lfscope(args.capture,
+                   rate=args.rate,
+                   fmt=args.format,
+                   lfdata=args.lfdata,
+                   invert=args.invert,
+                   level=args.level,
+                   inactivity=args.inactivity * 1e-3,
+                   verbose=args.verbose)
+
+
+def parser():
+    """Return argument parser for all commands"""
+    p = argparse.ArgumentParser(prog='rctool',
+                                description='RC transponder tools')
+    sub = p.add_subparsers(dest='command', metavar='command')
+    sub.required = True
+
+    c = sub.add_parser('info', help='read attached transponder info')
+    c.set_defaults(func=cmd_info)
+
+    c = sub.add_parser('patch', help='update transponder firmware')
+    c.add_argument('firmware', help='firmware hex image')
+    c.add_argument('idno', nargs='?', type=_idno,
+                   help='transponder ID (default: keep existing)')
+    c.set_defaults(func=cmd_patch)
+
+    c = sub.add_parser('genid', help='print ID blocks for a range of IDs')
+    c.add_argument('first', type=_idno, help='first ID')
+    c.add_argument('last', nargs='?', type=_idno, help='last ID')
+    c.set_defaults(func=cmd_genid, parser=c)
+
+    c = sub.add_parser('lfscope', help='analyse LF activation captures')
+    c.add_argument('capture', nargs='+', help='WAV or raw capture file')
+    c.add_argument('-r', '--rate', type=float,
+                   help='raw capture sample rate, Hz')
+    c.add_argument('-f', '--format', choices=sorted(RAWFORMATS),
+                   default='i16', help='raw capture sample format')
+    c.add_argument('--lfdata', action='store_true',
+                   help='capture is AFE LFDATA output, not coil')
+    c.add_argument('--invert', action='store_true',
+                   help='invert signal polarity (negates envelope)')
+    c.add_argument('--level', type=float,
+                   help='envelope threshold, negative with --invert '
+                   '(default: auto)')
+    c.add_argument('--inactivity', type=float, default=INACTIVITY * 1e3,
+                   help='AFE inactivity timeout, ms')
+    c.add_argument('-v', '--verbose', action='store_true',
+                   help='show processing details')
+    c.set_defaults(func=cmd_lfscope, parser=c)
+    return p
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# SPDX-License-Identifier: MIT
+#
+# Vectorised ID block generation for bulk ID ranges (requires numpy)
+#
+
+import numpy as np
+from .crc import MCRF4XXTBL
+from .idblock import BATTERY
+
+_MCRF4XXTBL = np.array(MCRF4XXTBL, dtype=np.uint32)
+
+
+def mcrf4xx_ids(idnos):
+    """Return array of MCRF4XX CRCs over the big-endian ID bytes"""
+    idnos = np.asarray(idnos, dtype=np.uint32)
+    r = np.full(idnos.shape, 0xffff, dtype=np.uint32)
+    for shift in (16, 8, 0):
+        b = (idnos >> shift) & 0xff
+        r = (r >> 8) ^ _MCRF4XXTBL[(r ^ b) & 0xff]
+    return r
+
+
+def idcrc4_ids(idnos):
+    """Return array of 4 bit CRCs on the ID numbers"""
+    idnos = np.asarray(idnos, dtype=np.uint32) & 0xfffff
+    r = (idnos ^ (idnos >> 8) ^ (idnos >> 16)) & 0xff
+    return (r ^ (r >> 4)) & 0xf
+
+
+def genid_ids(idnos, battery=BATTERY):
+    """Return (n, 29) array of id blocks for the provided ID numbers"""
+    idnos = np.asarray(idnos, dtype=np.uint32) & 0xffffff
+    crc = mcrf4xx_ids(idnos)
+    crc4 = idcrc4_ids(idnos)
+    b0 = (idnos >> 16) & 0xff
+    b1 = (idnos >> 8) & 0xff
+    b2 = idnos & 0xff
+    out = np.empty((len(idnos), 29), dtype=np.uint8)
+    out[:, 0] = b0
+    out[:, 1] = b1
+    out[:, 2] = b2
+    out[:, 3:7] = (0, 3, 4, 7)
+    col = 7
+    for bv in ((crc >> 8) & 0xff, b2, crc & 0xff, b1,
+               ((b0 << 4) | crc4) & 0xff):
+        for shift in (6, 4, 2, 0):
+            out[:, col] = 2 + ((bv >> shift) & 0x3)
+            col += 1
+    out[:, 27] = battery
+    out[:, 28] = 2
+    return out
@@ -0,0 +1,112 @@
+# SPDX-License-Identifier: MIT
+#
+# Transponder ID block encoding
+#
+# ID block example, transponder ID=93388 (0x016ccc):
+#
+# 0198: 309c movlw 0x9c
+# 0199: 008e movwf TMR1L ; reg: 0x00e
+# 019a: 30ff movlw 0xff
+# 019b: 008f movwf TMR1H ; reg: 0x00f
+# 019c: 00a3 movwf 0x23 ; reg: 0x023
+# 019d: 3001 movlw 0x01
+# 019e: 00c2 movwf 0x42 ; reg: 0x042
+# 019f: 306c movlw 0x6c
+# 01a0: 00c1 movwf 0x41 ; reg: 0x041
+# 01a1: 30cc movlw 0xcc
+# 01a2: 00c0 movwf 0x40 ; reg: 0x040
+# 01a3: 3000 movlw 0x00
+# 01a4: 00c3 movwf 0x43 ; reg: 0x043
+# 01a5: 3003 movlw 0x03
+# 01a6: 00c4 movwf 0x44 ; reg: 0x044
+# [...]
+# 01d3: 3002 movlw 0x02
+# 01d4: 00db movwf 0x5b ; reg: 0x05b
+# 01d5: 3002 movlw 0x02
+# 01d6: 00dc movwf 0x5c ; reg: 0x05c
+
+from struct import pack
+from .crc import mcrf4xx, idcrc4
+
+# Symbol written to the battery slot (0x5b) of new ID blocks
+BATTERY = 3
+
+
+def idtoken(bitval):
+    """Return encoded 2 bit value"""
+    return 2 + (bitval & 0x3)
+
+
+def genid(idno, battery=BATTERY):
+    """Return an id block for the provided idno"""
+    crc4 = idcrc4(idno)
+    idbytes = pack('>L', idno)[1:]
+    crc = mcrf4xx(idbytes)
+    idblock = [idbytes[0], idbytes[1], idbytes[2], 0, 3, 4, 7]
+    for bv in ((crc >> 8) & 0xff, idbytes[2], crc & 0xff, idbytes[1],
+               (idbytes[0] << 4) | (crc4 & 0xf)):
+        idblock.append(idtoken(bv >> 6))
+        idblock.append(idtoken(bv >> 4))
+        idblock.append(idtoken(bv >> 2))
+        idblock.append(idtoken(bv))
+    idblock.extend((battery, 2))
+    return idblock
+
+
+def find_idblock(fw):
+    """Find ID block pattern in fw"""
+    idx = None
+    pat = (0x00c2, 0x00c1, 0x00c0, 0x00c3, 0x00c4)
+    i = 0
+    j = 0
+    while idx is None:
+        try:
+            k = fw.index(pat[j], i)
+            if j > 0:
+                if k - i == (2 * j):
+                    j += 1
+                    if j == len(pat):
+                        idx = i - 1
+                else:
+                    i += (2 * j)
+                    j = 0
+            else:
+                j = 1
+                i = k
+        except ValueError:
+            break
+    return idx
+
+
+def read_idno(fw, idx):
+    """Return ID number from the id block at idx in fw"""
+    idno = fw[idx + 4] & 0xff
+    idno |= ((fw[idx + 2] & 0xff) << 8)
+    idno |= ((fw[idx] & 0xff) << 16)
+    return idno
+
+
+def patch_idblock(fw, idx, idblock):
+    """Overwrite literals of the id block at idx in fw"""
+    i = 0
+    for sym in idblock:
+        # clear bits
+        fw[idx + i] &= 0xff00
+        # copy in new bits
+        fw[idx + i] |= sym
+        i += 2
+
+
+def read_idlocs(idlocs):
+    """Return string version of IDlocs if programmed"""
+    unprogrammed = True
+    bv = []
+    for i in range(4):
+        if idlocs[i] != 0x3fff:
+            unprogrammed = False
+        bv.append((idlocs[i] >> 7) & 0x7f)
+        bv.append(idlocs[i] & 0x7f)
+    if unprogrammed:
+        return '[unprogrammed]'
+    else:
+        return bytes(bv).decode('ascii', 'replace')
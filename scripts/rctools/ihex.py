@@ -0,0 +1,51 @@
+# SPDX-License-Identifier: MIT
+#
+# Intel HEX output for PIC16F639 images
+#
+
+from struct import pack
+
+
+def ihexline(address, record, buf):
+    """Return intel hex encoded record for the provided buffer"""
+    addr = pack('>H', address)
+    sum = len(buf) + record
+    for b in addr:
+        sum += b
+    for b in buf:
+        sum += b
+    sum = (~(sum & 0xff) + 1) & 0xff
+    return ':%02X%s%02X%s%02X' % (len(buf), addr.hex().upper(), record,
+                                  buf.hex().upper(), sum)
+
+
+def prog_to_ihex(program):
+    """Yield intel hex encoded lines for provided program words"""
+    plen = len(program)
+    count = 0
+    stride = 0x8
+    while count < plen:
+        linelen = min(stride, plen - count)
+        buf = pack('<%dH' % (linelen), *program[count:count + linelen])
+        yield (ihexline(count << 1, 0, buf))
+        count += linelen
+
+
+def pic16f639_hex(program=None, config_word=None, idlocations=None):
+    """Return pic16f639 hex image for the provided sections"""
+    ret = []
+
+    # prepend the extended linear address
+    ret.append(ihexline(0, 0x04, b'\x00\x00'))
+
+    if program is not None:
+        for l in prog_to_ihex(program):
+            ret.append(l)
+    if config_word is not None:
+        ret.append(ihexline(0x400e, 0, pack('<H', config_word)))
+    if idlocations is not None:
+        ret.append(ihexline(0x4000, 0, pack('<4H', *idlocations)))
+
+    # append EOF
+    ret.append(ihexline(0, 1, b''))
+    return '\n'.join(ret)
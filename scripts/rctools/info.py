@@ -0,0 +1,60 @@
+# SPDX-License-Identifier: MIT
+#
+# Read attached transponder and display info
+#
+
+import logging
+import subprocess
+from struct import unpack
+from . import prog
+from .idblock import find_idblock, read_idno, read_idlocs
+
+_log = logging.getLogger('rcinfo')
+_log.setLevel(logging.DEBUG)
+
+
+def info():
+    """Read attached transponder and log firmware version and ID"""
+    ipecmd = prog.check_tools(_log)
+    if ipecmd is None:
+        return -1
+
+    tmpf = {}
+    try:
+        # Read target transponder memory
+        _log.debug('Reading firmware from target')
+        thex, orig_bin = prog.read_target(ipecmd, tmpf)
+
+        # find original transponder id block
+        orig_prog = unpack('<2048H', orig_bin[0:0x1000])
+        orig_idl = unpack('<4H', orig_bin[0x4000:0x4008])
+        orig_vers = read_idlocs(orig_idl)
+        _log.debug('ID Locations: %r (%s)', orig_vers, ', '.join(
+            (hex(w) for w in orig_idl)))
+        orig_idx = find_idblock(orig_prog)
+        if orig_idx is not None:
+            _log.debug('Target ID block offset: 0x%04x', orig_idx)
+            if orig_idx == 0x019d:
+                _log.info('Chronelec RC (ID@0x019d)')
+            elif orig_idx == 0x19c:
+                _log.info('Chronelec "Track" (ID@0x019c)')
+            else:
+                _log.info('%s (ID@0x%04x)', orig_vers, orig_idx)
+            orig_idno = read_idno(orig_prog, orig_idx)
+            _log.info('ID: %d (0x%05x)', orig_idno, orig_idno)
+        else:
+            _log.info('%s (No ID)', orig_vers)
+
+    except subprocess.CalledProcessError as e:
+        _log.debug('Error running command %s (%d), Output: \n%s', e.cmd,
+                   e.returncode, e.output.decode('utf-8', 'replace'))
+        _log.error('Info aborted')
+        return -2
+    except Exception as e:
+        _log.debug('%s: %s', e.__class__.__name__, e)
+        _log.error('Info aborted')
+        return -1
+    finally:
+        prog.cleanup(tmpf, _log)
+    _log.debug('Done')
+    return 0
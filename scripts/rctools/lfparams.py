@@ -0,0 +1,27 @@
+# SPDX-License-Identifier: MIT
+#
+# LF activation signal and AFE timing parameters
+#
+# Kept apart from lfscope so that the command line parser
+# can use them without importing numpy.
+#
+
+CARRIER = 125000  # LF carrier frequency, Hz
+MINCYCLE = 3.0  # minimum coil capture samples per carrier period
+ENVCYCLES = 8  # carrier periods per coil envelope bin (64 us)
+RESOLUTION = 8e-6  # LFDATA envelope resolution, s
+MINBINS = 64  # envelope bins required to test for modulation
+TESTTIME = 0.2  # length of envelope blocks tested for modulation, s
+CONTRAST = 6.0  # on/off separation required, multiple of noise
+CHUNKLEN = 1 << 20  # samples read per chunk
+
+# Raw capture sample formats, little-endian
+RAWFORMATS = {'u8': 'u1', 'i8': 'i1', 'i16': '<i2', 'f32': '<f4'}
+
+# AFE wakeup and message timing, s
+WAKEHIGH = 1e-3  # preamble on time
+WAKELOW = 1e-3  # preamble off time
+WAKETOL = 0.25  # fractional tolerance on preamble times
+INACTIVITY = 16e-3  # AFE inactivity timeout
+BURSTGAP = 5e-3  # minimum idle time separating bursts
+DROPOUT = 1.5  # missing burst threshold, multiple of median period
@@ -0,0 +1,425 @@
+# SPDX-License-Identifier: MIT
+#
+# Analyse sampled LF activation captures and report burst period,
+# duty cycle, jitter, field dropouts and predicted AFE wakeup.
+#
+# Captures are either WAV files (sample rate read from header) or
+# raw little-endian sample files with rate and sample format given
+# on the command line, eg:
+#
+#	$ ./rctool lfscope -r 1000000 -f i16 loop1.bin
+#	$ ./rctool lfscope --lfdata -r 100000 -f u8 lfdata.bin
+#
+# Coil captures (default) are rectified and boxcar filtered over
+# several carrier periods to recover the OOK envelope. LFDATA captures
+# are already demodulated by the AFE and are only thresholded. The
+# threshold is chosen once the envelope shows clear on/off modulation,
+# and bursts cut by the start or end of the capture are ignored.
+#
+# Samples are processed in fixed size chunks, so capture length
+# is limited only by disk space.
+
+import time
+import wave
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .lfparams import (CARRIER, MINCYCLE, ENVCYCLES, RESOLUTION, MINBINS,
+                       TESTTIME, CONTRAST, CHUNKLEN, RAWFORMATS, WAKEHIGH,
+                       WAKELOW, WAKETOL, INACTIVITY, BURSTGAP, DROPOUT)
+
+_log = logging.getLogger('lfscope')
+_log.setLevel(logging.DEBUG)
+
+
+def read_raw(filename, fmt, chunklen=CHUNKLEN):
+    """Yield sample chunks from a raw capture file"""
+    dtype = np.dtype(RAWFORMATS[fmt])
+    with open(filename, 'rb') as f:
+        while True:
+            buf = f.read(chunklen * dtype.itemsize)
+            if len(buf) < dtype.itemsize:
+                break
+            count = len(buf) // dtype.itemsize
+            yield np.frombuffer(buf, dtype, count)
+
+
+def read_wav(filename, chunklen=CHUNKLEN):
+    """Yield sample chunks from first channel of a PCM WAV capture"""
+    with wave.open(filename, 'rb') as w:
+        width = w.getsampwidth()
+        channels = w.getnchannels()
+        if width == 1:
+            dtype = np.dtype('u1')
+        elif width == 2:
+            dtype = np.dtype('<i2')
+        elif width == 4:
+            dtype = np.dtype('<i4')
+        else:
+            raise RuntimeError('Unsupported WAV sample width %d' % (width))
+        while True:
+            buf = w.readframes(chunklen)
+            if not buf:
+                break
+            yield np.frombuffer(buf, dtype)[::channels]
+
+
+def wav_rate(filename):
+    """Return sample rate of WAV capture"""
+    with wave.open(filename, 'rb') as w:
+        return w.getframerate()
+
+
+class OokDemod:
+    """Streaming OOK envelope demodulator
+
+    Samples are fed in arbitrary sized chunks and field on/off
+    transitions are returned as edge times in seconds. With invert,
+    the envelope is negated and a provided level must be negative.
+    """
+
+    def __init__(self, rate, lfdata=False, level=None, invert=False):
+        self.rate = rate
+        self.lfdata = lfdata
+        self.invert = invert
+        self.level = level
+        self.hyst = None
+        if level is not None:
+            # manual threshold, no modulation test
+            self.hyst = 0.1 * abs(level)
+        if lfdata:
+            self.binlen = max(1, round(rate * RESOLUTION))
+        else:
+            # average envelope over several carrier periods, so
+            # that ripple from a partial period is small
+            cycle = rate / CARRIER
+            if cycle < MINCYCLE:
+                raise RuntimeError('Sample rate too low for coil capture')
+            self.binlen = round(cycle * ENVCYCLES)
+        self.bintime = self.binlen / rate
+        self.state = None
+        self.count = 0  # envelope bins processed
+        self.tail = None
+        self.offset = None
+        self.pending = []  # envelope not yet tested for modulation
+        self.untested = 0
+        self.prev = None  # last block that failed the modulation test
+        self.testbins = max(MINBINS, round(TESTTIME / self.bintime))
+
+    def _envelope(self, samples):
+        """Return decimated envelope for a chunk of whole bins"""
+        x = samples.astype(np.float32)
+        if not self.lfdata:
+            if self.offset is None:
+                self.offset = float(np.median(x))
+            x = np.abs(x - self.offset)
+        env = x.reshape(-1, self.binlen).mean(axis=1)
+        if self.invert:
+            env = -env
+        return env
+
+    def _setlevel(self, env):
+        """Set threshold and hysteresis if env shows on/off modulation"""
+        lo = float(np.percentile(env, 5))
+        hi = float(np.percentile(env, 99))
+        span = hi - lo
+        if span <= 0:
+            return False
+        mid = 0.5 * (lo + hi)
+        on = env[env > mid]
+        off = env[env <= mid]
+        if len(on) == 0 or len(off) == 0:
+            return False
+        noise = np.sqrt(0.5 * (np.var(on) + np.var(off)))
+        if on.mean() - off.mean() < CONTRAST * noise:
+            return False
+        self.level = mid
+        self.hyst = 0.1 * span
+        _log.debug('Envelope threshold: %g (hysteresis %g)', self.level,
+                   self.hyst)
+        return True
+
+    def feed(self, samples):
+        """Process chunk of samples, return array of edge times and states"""
+        if self.tail is not None:
+            samples = np.concatenate((self.tail, samples))
+        whole = len(samples) - len(samples) % self.binlen
+        self.tail = samples[whole:]
+        if whole == 0:
+            return np.empty(0), np.empty(0, np.int8)
+        env = self._envelope(samples[:whole])
+        if self.hyst is None:
+            # hold envelope until a threshold can be chosen, testing
+            # each new block of testbins for modulation
+            self.pending.append(env)
+            self.untested += len(env)
+            if self.untested < self.testbins:
+                return np.empty(0), np.empty(0, np.int8)
+            return self._release(self.testbins)
+        return self._compare(env)
+
+    def _release(self, blocklen):
+        """Test held envelope in blocks, process from the first modulated"""
+        env = np.concatenate(self.pending)
+        self.pending = []
+        self.untested = 0
+        pos = 0
+        while len(env) - pos >= blocklen:
+            block = env[pos:pos + blocklen]
+            if self._setlevel(block):
+                # include the previous block, which may hold the
+                # start of activation
+                env = env[pos:]
+                if self.prev is not None:
+                    env = np.concatenate((self.prev, env))
+                    self.prev = None
+                return self._compare(env)
+            # drop unmodulated block, keeping time base
+            if self.prev is not None:
+                self.count += len(self.prev)
+            self.prev = block
+            pos += blocklen
+        if pos < len(env):
+            self.pending = [env[pos:]]
+            self.untested = len(env) - pos
+        return np.empty(0), np.empty(0, np.int8)
+
+    def _compare(self, env):
+        """Return edge times and states for a block of envelope"""
+        # hysteresis comparator: -1 where envelope is between thresholds
+        s = np.full(len(env) + 1, -1, np.int8)
+        if self.state is None:
+            # start in the state of the first bin, so that a capture
+            # beginning mid-pulse starts with a fall
+            self.state = int(env[0] > self.level)
+        s[0] = self.state
+        s[1:][env > self.level + self.hyst] = 1
+        s[1:][env < self.level - self.hyst] = 0
+        idx = np.where(s >= 0, np.arange(len(s)), 0)
+        np.maximum.accumulate(idx, out=idx)
+        s = s[idx]
+
+        edges = np.flatnonzero(np.diff(s))
+        times = (self.count + edges + 1) * self.bintime
+        states = s[edges + 1]
+        self.state = int(s[-1])
+        self.count += len(env)
+        return times, states
+
+    def flush(self):
+        """Return edges for any envelope held at the end of capture"""
+        if self.hyst is None and self.untested >= MINBINS:
+            return self._release(self.untested)
+        return np.empty(0), np.empty(0, np.int8)
+
+    def finish(self):
+        """Check that modulation was found, return capture duration"""
+        if self.hyst is None:
+            raise RuntimeError('No modulation found in capture')
+        return self.count * self.bintime
+
+
+def pulses(times, states):
+    """Return on pulse start and end arrays for the provided edges"""
+    if len(states) == 0:
+        return np.empty(0), np.empty(0)
+    # discard leading fall and trailing rise
+    if states[0] == 0:
+        times = times[1:]
+        states = states[1:]
+    if len(states) and states[-1] == 1:
+        times = times[:-1]
+        states = states[:-1]
+    return times[0::2], times[1::2]
+
+
+def analyse(starts, ends, duration, wakehigh=WAKEHIGH, wakelow=WAKELOW,
+            waketol=WAKETOL, inactivity=INACTIVITY, burstgap=BURSTGAP):
+    """Return dict of activation measurements for the provided pulses"""
+    ret = {
+        'duration': duration,
+        'pulses': len(starts),
+        'bursts': 0,
+        'duty': 0.0,
+        'period': None,
+        'jitter': None,
+        'pkjitter': None,
+        'burstlen': None,
+        'dropouts': 0,
+        'droptime': 0.0,
+        'maxdrop': 0.0,
+        'valid': 0,
+        'wakes': 0,
+        'awake': 0.0,
+        'maxawake': 0.0,
+        'nowake': 0,
+    }
+    if len(starts) == 0 or duration <= 0:
+        return ret
+    ret['duty'] = float((ends - starts).sum() / duration)
+
+    # discard bursts cut by the start or end of the capture
+    gaps = starts[1:] - ends[:-1]
+    split = np.flatnonzero(gaps > burstgap)
+    first = 0
+    last = len(starts)
+    if starts[0] < burstgap:
+        first = split[0] + 1 if len(split) else last
+    if duration - ends[-1] < burstgap:
+        last = split[-1] + 1 if len(split) else 0
+    starts = starts[first:last]
+    ends = ends[first:last]
+    ret['pulses'] = len(starts)
+    if len(starts) == 0:
+        return ret
+    on = ends - starts
+
+    # group pulses into bursts on idle gaps
+    gaps = starts[1:] - ends[:-1]
+    bidx = np.concatenate(([0], np.flatnonzero(gaps > burstgap) + 1))
+    bstart = starts[bidx]
+    bend = ends[np.concatenate((bidx[1:] - 1, [len(starts) - 1]))]
+    ret['bursts'] = len(bidx)
+    ret['burstlen'] = float(np.mean(bend - bstart))
+
+    # period and jitter over burst starts
+    if len(bstart) > 1:
+        period = np.diff(bstart)
+        nominal = float(np.median(period))
+        drop = period > DROPOUT * nominal
+        regular = period[~drop]
+        ret['period'] = float(np.mean(regular))
+        ret['jitter'] = float(np.std(regular))
+        ret['pkjitter'] = float(np.ptp(regular))
+        # field loss before the first or after the last burst
+        edge = np.array((bstart[0], duration - bstart[-1]))
+        missed = np.concatenate((period[drop], edge[edge > DROPOUT * nominal]))
+        missed -= nominal
+        ret['dropouts'] = len(missed)
+        if len(missed):
+            ret['droptime'] = float(missed.sum())
+            ret['maxdrop'] = float(missed.max())
+
+    # preamble check on first pulse and gap of each burst
+    high = on[bidx]
+    low = np.append(gaps, np.inf)[bidx]
+    single = np.append(np.diff(bidx) == 1, bidx[-1] == len(starts) - 1)
+    low[single] = np.inf
+    valid = ((np.abs(high - wakehigh) <= waketol * wakehigh)
+             & (np.abs(low - wakelow) <= waketol * wakelow))
+    ret['valid'] = int(valid.sum())
+
+    # AFE stays awake while field idle time is under the inactivity timeout
+    idle = bstart[1:] - bend[:-1]
+    sidx = np.concatenate(([0], np.flatnonzero(idle >= inactivity) + 1))
+    send = bend[np.concatenate((sidx[1:] - 1, [len(bidx) - 1]))]
+    first = np.where(valid, np.arange(len(bidx)), len(bidx))
+    first = np.minimum.reduceat(first, sidx)
+    woke = first < len(bidx)
+    ret['nowake'] = int((~woke).sum())
+    ret['wakes'] = int(woke.sum())
+    if ret['wakes']:
+        f = first[woke]
+        waketime = bstart[f] + high[f] + low[f]
+        awake = np.minimum(send[woke] + inactivity, duration) - waketime
+        ret['awake'] = float(awake.sum())
+        ret['maxawake'] = float(awake.max())
+    return ret
+
+
+def scan(chunks, rate, lfdata=False, level=None, invert=False, **kwargs):
+    """Demodulate a stream of sample chunks and return measurements"""
+    demod = OokDemod(rate, lfdata, level, invert)
+    tlist = []
+    slist = []
+    for chunk in chunks:
+        t, s = demod.feed(chunk)
+        if len(t):
+            tlist.append(t)
+            slist.append(s)
+    t, s = demod.flush()
+    if len(t):
+        tlist.append(t)
+        slist.append(s)
+    if tlist:
+        starts, ends = pulses(np.concatenate(tlist), np.concatenate(slist))
+    else:
+        starts, ends = pulses(np.empty(0), np.empty(0, np.int8))
+    return analyse(starts, ends, demod.finish(), **kwargs)
+
+
+def _ms(val):
+    """Return value in seconds formatted as milliseconds"""
+    if val is None:
+        return '-'
+    return '%0.3f ms' % (1000.0 * val)
+
+
+def report(name, res):
+    """Log a summary of measurements"""
+    _log.info('%s: %0.3f s, %d bursts, %d pulses', name, res['duration'],
+              res['bursts'], res['pulses'])
+    _log.info('Period: %s, jitter: %s rms, %s p-p', _ms(res['period']),
+              _ms(res['jitter']), _ms(res['pkjitter']))
+    _log.info('Duty cycle: %0.1f %%, burst length: %s', 100.0 * res['duty'],
+              _ms(res['burstlen']))
+    if res['dropouts']:
+        _log.warning('Dropouts: %d, missing %s, longest %s', res['dropouts'],
+                     _ms(res['droptime']), _ms(res['maxdrop']))
+    else:
+        _log.info('Dropouts: none')
+    _log.info('Valid preambles: %d/%d', res['valid'], res['bursts'])
+    _log.info('AFE wakeups: %d, awake: %0.3f s, longest %0.3f s',
+              res['wakes'], res['awake'], res['maxawake'])
+    if res['nowake']:
+        _log.warning('Activations without wakeup: %d', res['nowake'])
+
+
+def lfscope(captures,
+            rate=None,
+            fmt='i16',
+            lfdata=False,
+            invert=False,
+            level=None,
+            inactivity=INACTIVITY,
+            verbose=False):
+    """Analyse each of the provided capture files and log results"""
+    if not verbose:
+        _log.setLevel(logging.INFO)
+
+    if np is None:
+        _log.error('Missing numpy')
+        return -1
+
+    ret = 0
+    for capture in captures:
+        try:
+            if capture.lower().endswith('.wav'):
+                crate = wav_rate(capture)
+                chunks = read_wav(capture)
+            elif rate:
+                crate = rate
+                chunks = read_raw(capture, fmt)
+            else:
+                raise RuntimeError('Sample rate required for raw capture')
+            st = time.perf_counter()
+            res = scan(chunks,
+                       crate,
+                       lfdata=lfdata,
+                       level=level,
+                       invert=invert,
+                       inactivity=inactivity)
+            elapsed = time.perf_counter() - st
+            _log.debug('Processed %0.3f s in %0.3f s (%0.0fx real time)',
+                       res['duration'], elapsed,
+                       res['duration'] / max(elapsed, 1e-9))
+            report(capture, res)
+        except Exception as e:
+            _log.debug('%s: %s', e.__class__.__name__, e)
+            _log.error('%s: Analysis aborted: %s', capture, e)
+            ret = -1
+    return ret
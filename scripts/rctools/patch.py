@@ -0,0 +1,112 @@
+# SPDX-License-Identifier: MIT
+#
+# Re-program an attached RC transponder with new firmware,
+# and the ID number provided. If ID is omitted, use
+# ID from existing firmware or a randomly chosen ID between
+# 65536 and 131072.
+#
+# Note: The ID block is generated and patched into the
+# firmware before writing. If an ID block is not found in
+# the new firmware image, the update will abort with an error.
+#
+
+import os
+import logging
+import subprocess
+from struct import unpack
+from secrets import randbits
+from . import prog
+from .idblock import (find_idblock, genid, patch_idblock, read_idno,
+                      read_idlocs)
+from .ihex import pic16f639_hex
+
+_log = logging.getLogger('rcpatch')
+_log.setLevel(logging.DEBUG)
+
+
+def patch(fwfile, idno=None):
+    """Write fwfile to attached transponder with the provided ID"""
+    if idno is not None and not 0 <= idno <= 0xfffff:
+        raise ValueError('ID number out of range: %r' % (idno))
+    if not os.path.exists(fwfile):
+        print('Firmware image file not found')
+        return -1
+    fwfile = os.path.realpath(fwfile)
+
+    ipecmd = prog.check_tools(_log)
+    if ipecmd is None:
+        return -1
+
+    tmpf = {}
+    try:
+        # read in firmware image
+        _log.debug('Reading firmware image')
+        new_prog, new_cfg, new_idl = prog.split_image(
+            prog.read_hex(tmpf, 'nbin', fwfile))
+        new_prog = list(new_prog)
+        _log.debug('Configuration Word = 0x%04x', new_cfg)
+        _log.debug('ID Locations: %r (%s)', read_idlocs(new_idl), ', '.join(
+            (hex(w) for w in new_idl)))
+        new_idx = find_idblock(new_prog)
+        if new_idx is None:
+            raise RuntimeError('Firmware ID block not found')
+        _log.debug('Firmware ID block offset: 0x%04x', new_idx)
+
+        # Read target transponder memory
+        _log.debug('Reading old firmware from target')
+        thex, orig_bin = prog.read_target(ipecmd, tmpf)
+
+        # find original transponder id block
+        orig_prog = unpack('<2048H', orig_bin[0:0x1000])
+        orig_idl = unpack('<4H', orig_bin[0x4000:0x4008])
+        _log.debug('ID Locations: %r (%s)', read_idlocs(orig_idl), ', '.join(
+            (hex(w) for w in orig_idl)))
+        orig_idno = None
+        orig_idx = find_idblock(orig_prog)
+        if orig_idx is not None:
+            _log.debug('Target ID block offset: 0x%04x', orig_idx)
+            orig_idno = read_idno(orig_prog, orig_idx)
+            _log.debug('Target old ID: %d (0x%05x)', orig_idno, orig_idno)
+        else:
+            _log.warning('Target ID block not found')
+
+        # Backup old firmware
+        if orig_idno is not None:
+            backupname = '%d_orig.hex' % (orig_idno)
+            if not os.path.exists(backupname):
+                os.rename(thex, backupname)
+                _log.debug('Saved original firmware to %s', backupname)
+
+        # Prepare new ID block
+        if idno is None:
+            idno = orig_idno
+        if idno is None:
+            _log.debug('Using random ID')
+            idno = 0x10000 + randbits(16)
+
+        _log.debug('Creating new ID: %d (0x%05x)', idno, idno)
+        idblock = genid(idno)
+        _log.debug('%d - %s', idno, bytes(idblock).hex())
+
+        # patch firmware image with transponder id block
+        _log.debug('Patching ID block @ 0x%04x', new_idx)
+        patch_idblock(new_prog, new_idx, idblock)
+
+        # Write patched firmware back to transponder
+        _log.debug('Writing new firmware to target')
+        prog.write_target(ipecmd, tmpf,
+                          pic16f639_hex(new_prog, new_cfg, new_idl))
+
+    except subprocess.CalledProcessError as e:
+        _log.debug('Error running command %s (%d), Output: \n%s', e.cmd,
+                   e.returncode, e.output.decode('utf-8', 'replace'))
+        _log.error('Update aborted')
+        return -2
+    except Exception as e:
+        _log.debug('%s: %s', e.__class__.__name__, e)
+        _log.error('Update aborted')
+        return -1
+    finally:
+        prog.cleanup(tmpf, _log)
+    _log.info('Target updated OK')
+    return 0
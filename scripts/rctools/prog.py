@@ -0,0 +1,108 @@
+# SPDX-License-Identifier: MIT
+#
+# Programmer interface: MPLAB IPE command wrapper and objcopy
+#
+
+import os
+import shutil
+import subprocess
+from struct import unpack
+from tempfile import NamedTemporaryFile
+
+OBJCOPY = 'objcopy'
+IPECMD = 'ipecmd'
+MPLABLOG = 'MPLABXLog.xml'
+
+# Set POWER=True to power device from pickit programmer.
+# This option is required for programming ID Locations
+#
+# Warning: Remove battery before powering device from programmer
+POWER = True
+IPEARGS = ('-TPPK4', '-P16F639')
+
+
+def check_tools(log):
+    """Return path to ipecmd wrapper if required tools are available"""
+    if shutil.which(OBJCOPY) is None:
+        log.error('Missing objcopy')
+        return None
+    log.debug('objcopy: OK')
+    ipecmd = IPECMD
+    if shutil.which(IPECMD) is None:
+        # try scripts dir, one level above this package
+        ipecmd = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+            IPECMD)
+        if shutil.which(ipecmd) is None:
+            log.error('Missing ipecmd wrapper script')
+            return None
+    log.debug('ipecmd wrapper script: OK')
+    return ipecmd
+
+
+def tempfile(tmpf, key, suffix, mode='w+b'):
+    """Create a named temporary file and record it in tmpf for cleanup"""
+    tmpf[key] = NamedTemporaryFile(suffix=suffix,
+                                   prefix='t_',
+                                   mode=mode,
+                                   dir='.',
+                                   delete=False)
+    return tmpf[key]
+
+
+def cleanup(tmpf, log):
+    """Remove temporary files and MPLAB log"""
+    for t in tmpf:
+        if os.path.exists(tmpf[t].name):
+            os.unlink(tmpf[t].name)
+            log.debug('Remove temp file %s', t)
+    if os.path.exists(MPLABLOG):
+        log.debug('Remove MPLAB log')
+        os.unlink(MPLABLOG)
+
+
+def read_hex(tmpf, key, hexfile):
+    """Return binary image of hexfile, converted with objcopy"""
+    tempfile(tmpf, key, '.bin').close()
+    subprocess.run((OBJCOPY, '-Iihex', '-Obinary', hexfile, tmpf[key].name),
+                   check=True,
+                   capture_output=True)
+    with open(tmpf[key].name, 'rb') as f:
+        return f.read()
+
+
+def ipeargs(ipecmd, *args):
+    """Return ipecmd argument list for the provided options"""
+    ret = [ipecmd]
+    ret.extend(IPEARGS)
+    if POWER:
+        ret.append('-W')
+    ret.extend(args)
+    return ret
+
+
+def read_target(ipecmd, tmpf):
+    """Read target memory, return hex filename and binary image"""
+    tempfile(tmpf, 'thex', '.hex').close()
+    subprocess.run(ipeargs(ipecmd, '-GF' + tmpf['thex'].name),
+                   check=True,
+                   capture_output=True)
+    return tmpf['thex'].name, read_hex(tmpf, 'tbin', tmpf['thex'].name)
+
+
+def write_target(ipecmd, tmpf, hexdata):
+    """Write hex image to target"""
+    f = tempfile(tmpf, 'phex', '.hex', mode='w')
+    f.write(hexdata)
+    f.close()
+    subprocess.run(ipeargs(ipecmd, '-M', '-F' + f.name),
+                   check=True,
+                   capture_output=True)
+
+
+def split_image(image):
+    """Return program words, config word and ID locations from image"""
+    prog = unpack('<2048H', image[0:0x1000])
+    cfg = unpack('<H', image[0x400e:0x4010])[0]
+    idl = unpack('<4H', image[0x4000:0x4008])
+    return prog, cfg, idl
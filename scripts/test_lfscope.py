@@ -0,0 +1,163 @@
+# SPDX-License-Identifier: MIT
+#
+# lfscope tests, run with: python3 -m pytest scripts
+#
+
+import wave
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from rctools import lfscope
+from rctools.lfparams import CARRIER
+
+
+def _activation(duration, period=20e-3, offset=0.0):
+    """Return pulse starts and ends for a 1ms on/1ms off preamble
+    followed by three 0.5ms data pulses, repeated each period"""
+    pat = ((0, 1e-3), (2e-3, 2.5e-3), (3e-3, 3.5e-3), (4e-3, 4.5e-3))
+    starts = []
+    ends = []
+    t = offset
+    while t + period <= duration:
+        for s, e in pat:
+            starts.append(t + s)
+            ends.append(t + e)
+        t += period
+    return starts, ends
+
+
+def _field(t, start=0.0, stop=None):
+    """Return field on flags at times t for activation from start"""
+    ph = (t - start) % 20e-3
+    on = (ph < 1e-3) | ((ph >= 2e-3) & (ph < 4.5e-3) & (ph % 1e-3 < 0.5e-3))
+    on &= t >= start
+    if stop is not None:
+        on &= t < stop
+    return on
+
+
+def _coil(duration, rate=1e6, amplitude=8000, start=0.0, stop=None):
+    """Return synthetic coil capture with noise"""
+    t = np.arange(int(duration * rate)) / rate
+    on = _field(t, start, stop)
+    rng = np.random.default_rng(1)
+    x = on * amplitude * np.sin(2 * np.pi * CARRIER * t)
+    return (x + rng.normal(0, 300, len(t))).astype('<i2')
+
+
+def test_analyse_activation():
+    starts, ends = _activation(2.0, offset=10e-3)
+    res = lfscope.analyse(np.array(starts), np.array(ends), 2.0)
+    assert res['bursts'] == 99
+    assert res['period'] == pytest.approx(20e-3)
+    assert res['jitter'] == pytest.approx(0.0, abs=1e-9)
+    assert res['burstlen'] == pytest.approx(4.5e-3)
+    assert res['dropouts'] == 0
+    assert res['valid'] == 99
+    assert res['wakes'] == 1
+    assert res['nowake'] == 0
+
+    # drop 5 bursts, the field is idle past the inactivity timeout
+    keep = [i for i, s in enumerate(starts) if not 1.0 <= s < 1.1]
+    res = lfscope.analyse(np.array(starts)[keep], np.array(ends)[keep], 2.0)
+    assert res['dropouts'] == 1
+    assert res['droptime'] == pytest.approx(0.1)
+    assert res['wakes'] == 2
+
+
+def test_analyse_field_loss():
+    starts, ends = _activation(10.0, offset=15e-3)
+    starts = np.array(starts)
+    ends = np.array(ends)
+
+    # field stops at 5s
+    keep = starts < 5.0
+    res = lfscope.analyse(starts[keep], ends[keep], 10.0)
+    assert res['dropouts'] == 1
+    assert res['droptime'] == pytest.approx(5.0, abs=0.03)
+
+    # field starts at 5s
+    keep = starts >= 5.0
+    res = lfscope.analyse(starts[keep], ends[keep], 10.0)
+    assert res['dropouts'] == 1
+    assert res['droptime'] == pytest.approx(5.0, abs=0.03)
+
+
+def test_analyse_partial_bursts():
+    starts, ends = _activation(2.0, offset=10e-3)
+    # capture begins mid-preamble and ends mid-burst
+    starts = np.array(starts[1:] + [2.0105 - 0.5e-3]) - 10.5e-3
+    ends = np.array(ends[1:] + [2.0105 - 0.2e-3]) - 10.5e-3
+    res = lfscope.analyse(starts, ends, 2.0)
+    assert res['bursts'] == 98
+    assert res['jitter'] == pytest.approx(0.0, abs=1e-9)
+    assert res['valid'] == 98
+
+
+def test_scan_coil():
+    rate = 1e6
+    x = _coil(3.0, rate, start=1.2)
+    # no modulation in the first second
+    with pytest.raises(RuntimeError):
+        lfscope.scan((x[:1000000], ), rate)
+    # tiny chunks across the start of activation
+    y = x[1100000:1500000]
+    res = lfscope.scan((y[i:i + 7] for i in range(0, len(y), 7)), rate)
+    assert res['bursts'] == 15
+    assert res['valid'] == 15
+    res = lfscope.scan((x[i:i + 250000] for i in range(0, len(x), 250000)),
+                       rate)
+    assert res['duration'] == pytest.approx(3.0, abs=1e-3)
+    assert res['bursts'] == 90
+    assert res['period'] == pytest.approx(20e-3, abs=1e-4)
+    assert res['valid'] == 90
+    assert res['wakes'] == 1
+    assert res['dropouts'] == 1
+
+
+def test_scan_level():
+    rate = 1e6
+    x = _coil(1.0, rate, amplitude=3000)
+    # a manual threshold skips the modulation test
+    res = lfscope.scan((x, ), rate, level=1e5)
+    assert res['bursts'] == 0
+    res = lfscope.scan((x, ), rate, level=1000.0)
+    assert res['bursts'] == 49
+    assert res['valid'] == 49
+
+
+def test_scan_lfdata():
+    rate = 100000
+    t = np.arange(int(2.0 * rate)) / rate
+    x = np.where(_field(t, 10e-3), 200, 20).astype('u1')
+    res = lfscope.scan((x, ), rate, lfdata=True)
+    assert res['bursts'] == 100
+    assert res['period'] == pytest.approx(20e-3, abs=1e-4)
+    assert res['valid'] == 100
+
+    # active low LFDATA
+    res = lfscope.scan((255 - x, ), rate, lfdata=True, invert=True)
+    assert res['bursts'] == 100
+    assert res['valid'] == 100
+    res = lfscope.scan((255 - x, ), rate, lfdata=True, invert=True,
+                       level=-150.0)
+    assert res['bursts'] == 100
+
+
+def test_read_wav(tmp_path):
+    rate = 500000
+    x = _coil(1.0, rate)
+    filename = str(tmp_path / 'coil.wav')
+    with wave.open(filename, 'wb') as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(np.stack((x, -x), axis=1).tobytes())
+    assert lfscope.wav_rate(filename) == rate
+    chunks = list(lfscope.read_wav(filename, chunklen=100000))
+    assert len(chunks) == 5
+    assert np.array_equal(np.concatenate(chunks), x)
+    res = lfscope.scan(lfscope.read_wav(filename), rate)
+    assert res['bursts'] == 49
+    assert res['valid'] == 49
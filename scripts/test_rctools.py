@@ -0,0 +1,134 @@
+# SPDX-License-Identifier: MIT
+#
+# rctools tests, run with: python3 -m pytest scripts
+#
+
+import os
+import re
+import random
+from struct import pack
+import pytest
+from rctools import crc, idblock, ihex, prog
+
+FIRMWARE = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..',
+                        'firmware')
+
+
+def _asm_idblock(filename):
+    """Return literals loaded into the ID block registers 0x40-0x5c"""
+    lits = []
+    lit = None
+    with open(filename) as f:
+        for line in f:
+            m = re.match(r'\s+movlw\s+(0x[0-9a-f]+)', line)
+            if m:
+                lit = int(m.group(1), 16)
+                continue
+            m = re.match(r'\s+movwf\s+(0x[0-9a-f]+)', line)
+            if m and lit is not None:
+                reg = int(m.group(1), 16)
+                if reg == 0x42:
+                    lits = []
+                if 0x40 <= reg <= 0x5c:
+                    lits.append(lit)
+                    if reg == 0x5c:
+                        break
+            lit = None
+    return lits
+
+
+def _hex_image(filename):
+    """Return binary image of program, ID and config words in hex file"""
+    mem = bytearray(b'\xff' * 0x4010)
+    with open(filename) as f:
+        for line in f:
+            rec = bytes.fromhex(line.strip()[1:])
+            addr = (rec[1] << 8) | rec[2]
+            if rec[3] == 0 and addr < len(mem):
+                mem[addr:addr + rec[0]] = rec[4:4 + rec[0]]
+    return bytes(mem)
+
+
+def test_crc_examples():
+    assert crc.mcrf4xx(b'\x01\xe2\x40') == 0xfbc2
+    assert crc.idcrc4(123456) == 0x9
+
+
+def test_genid_firmware():
+    block = _asm_idblock(os.path.join(FIRMWARE, '93388.asm'))
+    assert len(block) == 29
+    assert idblock.genid(93388, battery=2) == block
+    assert idblock.genid(93388)[-2:] == [idblock.BATTERY, 2]
+
+
+def test_find_idblock_firmware():
+    fw = list(prog.split_image(_hex_image(os.path.join(FIRMWARE,
+                                                       '93388.hex')))[0])
+    idx = idblock.find_idblock(fw)
+    assert idx == 0x019d
+    assert idblock.read_idno(fw, idx) == 93388
+    idblock.patch_idblock(fw, idx, idblock.genid(123456))
+    assert idblock.find_idblock(fw) == idx
+    assert idblock.read_idno(fw, idx) == 123456
+
+
+def test_batch_genid():
+    np = pytest.importorskip('numpy')
+    from rctools import batch
+    rng = random.Random(1)
+    ids = [0, 1, 93388, 123456, 0xfffff]
+    ids.extend(rng.randrange(0x100000) for i in range(1000))
+    blocks = batch.genid_ids(ids)
+    for idno, block in zip(ids, blocks):
+        assert block.tolist() == idblock.genid(idno)
+    assert batch.genid_ids(ids, battery=2)[:, 27].tolist() == [2] * len(ids)
+
+
+def test_hex_roundtrip():
+    filename = os.path.join(FIRMWARE, '93388.hex')
+    program, cfg, idl = prog.split_image(_hex_image(filename))
+    assert len(program) == 2048
+    assert cfg == 0x28fa
+    assert idl == (0x3fff, 0x3fff, 0x3fff, 0x3fff)
+    # data EEPROM records (0x4200-0x43ff) are not written
+    with open(filename) as f:
+        orig = [l.strip() for l in f if not l.startswith(':1042')
+                and not l.startswith(':1043')]
+    assert ihex.pic16f639_hex(program, cfg, idl).split('\n') == orig
+
+
+def test_ihexline():
+    assert ihex.ihexline(0, 0x04, b'\x00\x00') == ':020000040000FA'
+    assert ihex.ihexline(0, 1, b'') == ':00000001FF'
+    assert ihex.ihexline(0x400e, 0, pack('<H', 0x28fa)) == ':02400E00FA288E'
+
+
+def test_split_image():
+    words = [(i * 7) & 0x3fff for i in range(2048)]
+    image = bytearray(b'\xff' * 0x4010)
+    image[0:0x1000] = pack('<2048H', *words)
+    image[0x4000:0x4008] = pack('<4H', 1, 2, 3, 4)
+    image[0x400e:0x4010] = pack('<H', 0x1234)
+    program, cfg, idl = prog.split_image(bytes(image))
+    assert list(program) == words
+    assert cfg == 0x1234
+    assert idl == (1, 2, 3, 4)
+
+
+def test_patch_idno_range():
+    from rctools.patch import patch
+    with pytest.raises(ValueError):
+        patch('firmware.hex', 0x100000)
+    with pytest.raises(ValueError):
+        patch('firmware.hex', -1)
+
+
+def test_genid_command(capsys):
+    from rctools.__main__ import main
+    assert main(['genid', '93388']) == 0
+    out = capsys.readouterr().out
+    assert out == '93388 - %s\n' % (bytes(idblock.genid(93388)).hex())
+    for argv in (['genid', '5', '3'], ['genid', '0x100000'], ['genid', '-1']):
+        with pytest.raises(SystemExit):
+            main(argv)
+        assert 'usage: rctool genid' in capsys.readouterr().err